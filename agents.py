@@ -0,0 +1,331 @@
+import json
+import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field
+from agno.agent import Agent
+from agno.utils.functions import cache_result
+from config import require_api_key
+
+# Model SDKs and tools are imported inside the builders below, so an entrypoint
+# only pays the import cost of the backend it actually uses.
+
+BACKENDS = ("groq", "gemini")
+
+# YFinance results are cached on disk with a short TTL: quotes move on ~minute
+# granularity, so repeat lookups within a turn (or across sessions) skip Yahoo.
+YF_CACHE_TTL = 60  # seconds
+YF_CACHE_DIR = ".yf_cache"
+
+GROQ_ROUTING_INSTRUCTIONS = [
+    "Use this routing logic:",
+    "1. For questions containing: stock symbols ($), 'financial', 'invest' -> Use Finance Agent",
+    "2. For questions about news, trends, or general research -> Use Web Agent",
+    "3. For combined queries -> Use both agents sequentially",
+    "4. Always show data sources and use tables for financial data"
+]
+
+class FinanceResponse(BaseModel):
+    """Structured answer from the Gemini Finance Agent, so callers get the ticker without parsing markdown."""
+    primary_ticker: Optional[str] = Field(None, description="The main stock ticker symbol the answer is about, e.g. MSFT. Null if none.")
+    markdown_body: str = Field(..., description="The full answer in Markdown, including any data tables.")
+
+# --- Shared clients and tools (built once per process) ---
+
+@lru_cache(maxsize=1)
+def get_http_client():
+    """One pooled HTTP client under the shared Groq client, so the team reuses keep-alive connections."""
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        transport=httpx.HTTPTransport(retries=2),
+    )
+
+@lru_cache(maxsize=1)
+def get_groq_client():
+    """One Groq API client on the pooled HTTP client, shared by every Groq model's `run`.
+
+    Only the sync client is shared: agno builds a fresh AsyncGroq for each `arun`
+    call, which keeps async connections on whichever event loop made them.
+    """
+    from groq import Groq
+    return Groq(api_key=require_api_key('GROQ_API_KEY'), max_retries=2, http_client=get_http_client())
+
+@lru_cache(maxsize=1)
+def get_gemini_client():
+    """One Gemini API client shared by every Gemini model, so all agents share one connection pool."""
+    from google import genai
+    return genai.Client(api_key=require_api_key('GEMINI_API_KEY'))
+
+@lru_cache(maxsize=1)
+def get_duckduckgo_tools():
+    from agno.tools.duckduckgo import DuckDuckGoTools
+    return DuckDuckGoTools()
+
+@lru_cache(maxsize=None)
+def get_yfinance_tools(**features):
+    """Returns a cached YFinanceTools instance with the given features enabled and result caching on."""
+    from agno.tools.yfinance import YFinanceTools
+    return YFinanceTools(**features, cache_results=True, cache_ttl=YF_CACHE_TTL, cache_dir=YF_CACHE_DIR)
+
+@cache_result(cache_dir=YF_CACHE_DIR, cache_ttl=YF_CACHE_TTL)
+def _download_closes(symbols: List[str], period: str) -> str:
+    """Downloads daily closes for already-normalised `symbols` as get_prices' JSON.
+
+    Raises on failure instead of returning an error string, so a transient Yahoo error is never cached.
+    """
+    import yfinance as yf
+    # One batched download for every symbol instead of a request per ticker
+    data = yf.download(" ".join(symbols), period=period, group_by="ticker", threads=True, progress=False)
+    downloaded = set(data.columns.get_level_values(0))
+    prices, missing = {}, []
+    for symbol in symbols:
+        # Symbols that failed to download are absent, or present with only NaN rows
+        closes = data[symbol]["Close"].dropna() if symbol in downloaded else ()
+        if len(closes):
+            prices[symbol] = {str(day.date()): round(float(close), 4) for day, close in closes.items()}
+        else:
+            missing.append(symbol)
+    return json.dumps({"prices": prices, "missing": missing}, indent=2)
+
+def get_prices(tickers: List[str], period: str = "1mo") -> str:
+    """Use this function to get recent daily closing prices for one or more stock symbols in a single request.
+
+    Args:
+        tickers (List[str]): The stock symbols, e.g. ["TSLA", "AAPL"].
+        period (str): How far back to fetch. Defaults to "1mo".
+                    Valid periods: 1d,5d,1mo,3mo,6mo,1y,2y,5y,10y,ytd,max
+
+    Returns:
+        str: JSON with "prices" (each symbol's closing prices by date) and "missing" (symbols with no data), or an error message.
+    """
+    # yf.download upper-cases symbols, so normalise them the same way before looking them up in its columns
+    symbols = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+    try:
+        return _download_closes(symbols, period)
+    except Exception as e:
+        return f"Error fetching prices for {tickers}: {e}"
+
+def groq_model(model_id: str, **kwargs):
+    """Builds a Groq model with the project's defaults and the shared client."""
+    from agno.models.groq import Groq
+    return Groq(id=model_id, api_key=require_api_key('GROQ_API_KEY'), temperature=0.2, max_retries=2,
+                client=get_groq_client(), **kwargs)
+
+def gemini_model(temperature: float, **kwargs):
+    """Builds a Gemini model on the shared client."""
+    from agno.models.google import Gemini
+    return Gemini(id="gemini-2.0-flash", api_key=require_api_key('GEMINI_API_KEY'), client=get_gemini_client(),
+                  temperature=temperature, **kwargs)
+
+# --- Teams ---
+
+def build_groq_members() -> Tuple[Agent, Agent]:
+    """Builds fresh Groq (web_agent, finance_agent) members, for scripts that assemble their own team."""
+    web_agent = Agent(
+        name="Web Agent",
+        role="Search the web for information",
+        model=groq_model("llama-3.3-70b-versatile"),
+        tools=[get_duckduckgo_tools()],
+        instructions="Use this agent for market trends, news, and competitor analysis",
+        show_tool_calls=True,
+        markdown=True,
+    )
+
+    finance_agent = Agent(
+        name="Finance Agent",
+        role="Get financial data",
+        model=groq_model("llama3-70b-8192", request_params={"parallel_tool_calls": True}),
+        tools=[get_yfinance_tools(stock_price=True, analyst_recommendations=True, company_info=True), get_prices],
+        instructions=[
+            "Use this agent for stock prices, analyst ratings, and financial metrics",
+            "When multiple tickers are requested, emit all YFinance tool calls in a single parallel batch",
+            "For comparisons of N tickers, call `get_prices` ONCE with the full list",
+        ],
+        show_tool_calls=True,
+        markdown=True,
+    )
+
+    return web_agent, finance_agent
+
+def _build_groq_team() -> Agent:
+    return Agent(
+        team=list(build_groq_members()),
+        model=groq_model("llama-3.1-8b-instant"),
+        instructions=GROQ_ROUTING_INSTRUCTIONS,
+        show_tool_calls=True,
+        markdown=True,
+    )
+
+def build_gemini_members() -> Tuple[Agent, Agent, Agent]:
+    """Builds fresh Gemini (web_agent, finance_agent, sentiment_agent) members, for scripts that assemble their own team."""
+    web_agent = Agent(
+        name="Web Agent",
+        role="Search the web for current information, news, and market trends",
+        model=gemini_model(0.2, grounding=True, search=True), # Faster model for web search summaries
+        tools=[get_duckduckgo_tools()],
+        instructions="Focus on retrieving recent and relevant information. Summarize findings concisely in plain text. If you must emphasize, use bold text (`**text**`). Provide source URLs at the end of each summarized point in plain text within parentheses.",
+        show_tool_calls=True,
+        markdown=True,
+    )
+
+    finance_agent = Agent(
+        name="Finance Agent",
+        role="Retrieve and analyze stock data, financial statements, and key metrics",
+        model=gemini_model(0.1), # Powerful model for financial analysis, low temp; Gemini batches independent function calls natively
+        tools=[get_yfinance_tools(
+            stock_price=True,
+            analyst_recommendations=True,
+            company_info=True,
+            stock_fundamentals=True,
+            income_statements=True,
+            key_financial_ratios=True,
+        ), get_prices],
+        instructions=[
+            "Provide detailed financial information using the available tools.",
+            "Present financial data (fundamentals, ratios, income statements) in well-formatted Markdown tables.",
+            "Offer brief interpretations or summaries of the data.",
+            "IMPORTANT: Clearly state the primary stock ticker symbol (e.g., MSFT, GOOGL) for which you are providing data, usually near the beginning of your response or table.",
+            "If multiple tickers are relevant, focus on the main one queried.",
+            "When multiple tickers are requested, emit all YFinance tool calls in a single parallel batch.",
+            "For comparisons of N tickers, call `get_prices` ONCE with the full list.",
+        ],
+        response_model=FinanceResponse,
+        use_json_mode=True, # Gemini can't combine function calling with a native response schema
+        show_tool_calls=True,
+        markdown=True,
+    )
+
+    sentiment_agent = Agent(
+        name="Sentiment Analyzer",
+        role="Analyze the sentiment of provided text (e.g., news snippets)",
+        model=gemini_model(0.3), # Fast model for sentiment
+        instructions="Analyze the sentiment (positive, negative, neutral) of the input text and provide a brief justification.",
+        show_tool_calls=False,
+        markdown=True,
+    )
+
+    return web_agent, finance_agent, sentiment_agent
+
+def _build_gemini_team() -> Agent:
+    # Coordinator Agent
+    return Agent(
+        team=list(build_gemini_members()),
+        model=gemini_model(0.2), # Fast model for routing
+        instructions=[
+            "Carefully analyze the user's query and route it to the most appropriate agent or sequence of agents based on keywords.",
+            "Routing Logic:",
+            "1. Stock symbols ($, or common patterns like AAPL, MSFT), 'stock', 'financial', 'invest', 'price', 'recommendation', 'earnings', 'fundamentals', 'income statement', 'financial ratios' -> **Finance Agent** is primary. If news is also asked for, use Web Agent first, then Finance Agent.",
+            "2. General news, market trends, competitor research -> **Web Agent**.",
+            "3. Explicit request to 'analyze sentiment' -> **Sentiment Analyzer** (requires text input, potentially from Web Agent first).",
+            "4. Combine results logically if multiple agents are used.",
+            "5. Ensure the final response is comprehensive and directly answers the user's query.",
+            "6. Prefer Markdown tables for structured financial data presentation (Finance Agent should handle this)."
+        ],
+        show_tool_calls=True,
+        markdown=True,
+    )
+
+# --- Connection prewarming ---
+
+def _prewarm(backend: str):
+    """Pays DNS/TCP/TLS setup for the first query's hosts while the user is still typing.
+
+    Best effort: each step is independent, and a failure just leaves that cost to the first real query.
+    """
+    def warm_yfinance():
+        import yfinance as yf
+        # yfinance keeps one process-wide session: this fetches its cookie and crumb and opens a keep-alive connection
+        yf.Ticker("AAPL").history(period="1d")
+
+    steps = [
+        lambda: socket.getaddrinfo("duckduckgo.com", 443), # DuckDuckGo builds a fresh client per search, so only DNS can be warmed
+        warm_yfinance,
+    ]
+    if backend == "groq":
+        # Opens a TLS connection in the pool that every Groq model in the team reuses
+        steps.append(lambda: get_http_client().get("https://api.groq.com/", timeout=3))
+    for step in steps:
+        try:
+            step()
+        except Exception as e:
+            print(f"--- Prewarm step failed (ignored): {e} ---") # For debugging
+
+@lru_cache(maxsize=len(BACKENDS))
+def get_team(backend: str = "groq") -> Agent:
+    """Returns the coordinator agent for `backend` ("groq" or "gemini"), built once per process."""
+    print(f"--- Initializing Agents for {backend} (should happen once per process) ---") # For debugging
+    if backend == "groq":
+        team = _build_groq_team()
+    elif backend == "gemini":
+        team = _build_gemini_team()
+    else:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+    threading.Thread(target=_prewarm, args=(backend,), name="prewarm", daemon=True).start()
+    return team
+
+def get_member(name: str, backend: str = "groq") -> Agent:
+    """Returns the team member called `name` (e.g. "Finance Agent") from the cached team."""
+    for agent in get_team(backend).team:
+        if agent.name == name:
+            return agent
+    raise KeyError(f"No agent named {name!r} in the {backend} team")
+
+# --- Keyword pre-routing ---
+# When a prompt's keywords point at exactly one member, call that member
+# directly and skip the coordinator's LLM routing round-trip. Anything
+# ambiguous (no match, or several members matched) still goes to the team.
+
+ROUTING_KEYWORDS = {
+    "Finance Agent": ("$", "financial", "invest", "stock", "earnings", "price", "fundamentals", "ratio"),
+    "Web Agent": ("news", "trend", "competitor", "market outlook"),
+}
+
+def _keyword_pattern(keyword: str) -> str:
+    """Matches `keyword` as a whole word or a plain inflection ("stocks", "investing"), never inside
+    another word ("investigate", "Corporation"). "$" (as in "$AAPL") has no word boundary and matches anywhere."""
+    if not keyword[0].isalnum():
+        return re.escape(keyword)
+    return rf"\b{re.escape(keyword)}(?:s|es|ing|ment|ments|or|ors)?\b"
+
+_ROUTED_MEMBERS = list(ROUTING_KEYWORDS)
+# One capture group per member, all in one alternation, so the prompt is scanned once
+_ROUTING_RE = re.compile("|".join(
+    "(" + "|".join(_keyword_pattern(keyword) for keyword in keywords) + ")" for keywords in ROUTING_KEYWORDS.values()
+))
+
+def match_members(prompt: str, backend: str = "groq") -> List[Agent]:
+    """Returns the team members the prompt's keywords point to, in ROUTING_KEYWORDS order."""
+    matched = {_ROUTED_MEMBERS[match.lastindex - 1] for match in _ROUTING_RE.finditer(prompt.lower())}
+    return [get_member(name, backend) for name in _ROUTED_MEMBERS if name in matched]
+
+def route_query(prompt: str, backend: str = "groq") -> Optional[Agent]:
+    """Returns the single team member the prompt's keywords point to, or None if the coordinator should decide."""
+    members = match_members(prompt, backend)
+    return members[0] if len(members) == 1 else None
+
+# --- Parallel fan-out ---
+# agno hands a coordinator's tasks to its members one after another, so a
+# prompt that needs several members pays the sum of their latencies. When the
+# keywords already name every member needed, call them concurrently ourselves
+# and leave the coordinator only the final synthesis.
+
+def _answer_text(content: Any) -> str:
+    return content.markdown_body if isinstance(content, FinanceResponse) else str(content)
+
+def run_members_in_parallel(members: List[Agent], prompt: str) -> Dict[str, str]:
+    """Runs every member on `prompt` at once (one thread each) and returns their answers by member name."""
+    with ThreadPoolExecutor(max_workers=len(members), thread_name_prefix="member-run") as pool:
+        responses = list(pool.map(lambda member: member.run(prompt), members))
+    return {member.name: _answer_text(response.content) for member, response in zip(members, responses)}
+
+def synthesis_prompt(task: str, findings: Dict[str, str]) -> str:
+    """Builds the coordinator prompt that combines members' `findings` into one answer to `task`."""
+    return (
+        f"{task}\n\n"
+        "Answer using only the findings below, without delegating to the team again.\n\n"
+        + "\n\n".join(f"{name} findings:\n{answer}" for name, answer in findings.items())
+    )
@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List
+
+# Only the newest messages live in session state and re-render on every rerun;
+# everything is archived in SQLite and older turns are rendered on request.
+MAX_RENDERED_MESSAGES = 20
+DB_PATH = "chat.db"
+RETENTION_DAYS = 30 # Archived messages older than this are deleted
+
+_lock = threading.Lock() # One connection is shared by all Streamlit script threads
+
+@lru_cache(maxsize=1)
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False) # Autocommit
+    conn.execute("PRAGMA journal_mode=WAL") # Appends don't block readers
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS messages ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+        "app TEXT NOT NULL DEFAULT '', session_id TEXT NOT NULL DEFAULT '')"
+    )
+    # Archives created before messages were scoped: their rows keep the empty app/session and are never loaded
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+    for column in ("app", "session_id"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE messages ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+    conn.execute("CREATE INDEX IF NOT EXISTS messages_by_session ON messages (app, session_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS messages_by_ts ON messages (ts)")
+    return conn
+
+def _prune(conn: sqlite3.Connection):
+    """Deletes every session's messages older than RETENTION_DAYS, so the archive doesn't grow forever."""
+    conn.execute("DELETE FROM messages WHERE ts < ?", (time.time() - RETENTION_DAYS * 86400,))
+
+def _to_message(row) -> Dict:
+    return {"id": row[0], "role": row[1], "content": row[2]}
+
+# Every query is scoped to one app ("groq", "gemini") and one chat id, so chats
+# never leak between users or between the two apps. The apps keep the chat id in
+# the page URL, so reloading or bookmarking the page brings its history back.
+
+def load_recent(app: str, session_id: str, limit: int = MAX_RENDERED_MESSAGES) -> Deque[Dict]:
+    """Returns the session's newest `limit` archived messages, oldest first, in a deque capped at `limit`.
+
+    Called once when a browser session starts, which is also when expired messages are pruned.
+    """
+    with _lock:
+        _prune(_connect())
+        rows = _connect().execute(
+            "SELECT id, role, content FROM messages WHERE app = ? AND session_id = ? ORDER BY id DESC LIMIT ?",
+            (app, session_id, limit),
+        ).fetchall()
+    return deque((_to_message(row) for row in reversed(rows)), maxlen=limit)
+
+def has_older(app: str, session_id: str, before_id: int) -> bool:
+    """Returns True if the session has any archived message older than `before_id`."""
+    with _lock:
+        return _connect().execute(
+            "SELECT EXISTS(SELECT 1 FROM messages WHERE app = ? AND session_id = ? AND id < ?)",
+            (app, session_id, before_id),
+        ).fetchone()[0] == 1
+
+def load_older(app: str, session_id: str, before_id: int) -> List[Dict]:
+    """Returns all of the session's archived messages older than `before_id`, oldest first."""
+    with _lock:
+        rows = _connect().execute(
+            "SELECT id, role, content FROM messages WHERE app = ? AND session_id = ? AND id < ? ORDER BY id",
+            (app, session_id, before_id),
+        ).fetchall()
+    return [_to_message(row) for row in rows]
+
+def append(app: str, session_id: str, messages: Deque[Dict], role: str, content: str):
+    """Archives a message for the session and appends it to the session's bounded history."""
+    with _lock:
+        cursor = _connect().execute(
+            "INSERT INTO messages (ts, app, session_id, role, content) VALUES (?, ?, ?, ?, ?)",
+            (time.time(), app, session_id, role, content),
+        )
+    messages.append({"id": cursor.lastrowid, "role": role, "content": content})
+
+def clear(app: str, session_id: str):
+    """Deletes the session's archived messages."""
+    with _lock:
+        _connect().execute("DELETE FROM messages WHERE app = ? AND session_id = ?", (app, session_id))
@@ -1,5 +1,21 @@
 import subprocess
+import json
 import re
+from importlib.metadata import version, PackageNotFoundError
+
+def get_pip_list_versions():
+    """
+    Returns a dictionary of every installed package and its version from a single
+    `pip list` call. Used as a fallback for names importlib.metadata can't resolve.
+    """
+    result = subprocess.run(
+        ["pip", "list", "--format=json"], capture_output=True, text=True, check=True
+    )
+    # Normalize names the way pip does so lookups like "plotly_express" still match
+    return {
+        re.sub(r"[-_.]+", "-", pkg["name"]).lower(): pkg["version"]
+        for pkg in json.loads(result.stdout)
+    }
 
 def get_installed_package_versions(requirements_file="requirements.txt"):
     """
@@ -15,6 +31,7 @@ def get_installed_package_versions(requirements_file="requirements.txt"):
     """
 
     installed_versions = {}
+    pip_versions = None
     try:
         with open(requirements_file, "r") as f:
             packages = [line.strip() for line in f if line.strip() and not line.startswith("#")]
@@ -28,19 +45,26 @@ def get_installed_package_versions(requirements_file="requirements.txt"):
                 print(f"Warning: Could not parse package name from line: {package}")
                 continue
 
+            # In-process metadata lookup: no interpreter spawn per package
+            try:
+                installed_versions[package_name] = version(package_name)
+                continue
+            except PackageNotFoundError:
+                pass
+
             try:
-                result = subprocess.run(
-                    ["pip", "show", package_name], capture_output=True, text=True, check=True
-                )
-                output = result.stdout
-                version_match = re.search(r"Version: (\S+)", output)
-                if version_match:
-                    installed_versions[package_name] = version_match.group(1)
+                # Fetched once, only if some package needs the fallback
+                if pip_versions is None:
+                    pip_versions = get_pip_list_versions()
+                normalized_name = re.sub(r"[-_.]+", "-", package_name).lower()
+                if normalized_name in pip_versions:
+                    installed_versions[package_name] = pip_versions[normalized_name]
                 else:
-                    print(f"Warning: Could not find version for {package_name}")
+                    print(f"Warning: Could not find package {package_name}")
 
             except subprocess.CalledProcessError as e:
-                print(f"Warning: Could not find package {package_name}: {e}")
+                print(f"Warning: Could not list installed packages: {e}")
+                pip_versions = {}
             except FileNotFoundError:
                 print("Error: pip command not found.  Is pip installed?")
                 return {}  # Exit if pip isn't found
@@ -60,7 +84,7 @@ if __name__ == "__main__":
     installed_versions = get_installed_package_versions()
     if installed_versions:
         print("Installed Package Versions:")
-        for package, version in installed_versions.items():
-            print(f"- {package}: {version}")
+        for package, pkg_version in installed_versions.items():
+            print(f"- {package}: {pkg_version}")
     else:
         print("Could not retrieve package versions.")
\ No newline at end of file
@@ -0,0 +1,16 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from a .env file (once, for every entrypoint)
+load_dotenv()
+
+def require_api_key(name: str) -> str:
+    """Returns the API key stored in the environment variable `name`.
+
+    Raises:
+        KeyError: If the variable is missing or empty.
+    """
+    api_key = os.getenv(name)
+    if not api_key:
+        raise KeyError(f"{name} not found! Please ensure you have a .env file in the same directory with {name}='your_key'.")
+    return api_key
@@ -1,19 +1,15 @@
 import streamlit as st
-from agno.agent import Agent
-from agno.models.groq import Groq
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.yfinance import YFinanceTools
-import os
-import time
-from dotenv import load_dotenv
+import chat_history
+from uuid import uuid4
+from agents import get_team, match_members, run_members_in_parallel, synthesis_prompt
+from streaming import stream_in_background
 
-# Load environment variables
-load_dotenv()
-groq_api_key = os.environ['GROQ_API_KEY']
+CHAT_APP = "groq" # Scopes this app's archived chats apart from the other app's
 
-# Set up custom CSS
-def set_custom_css():
-    st.markdown("""
+# Custom CSS, built once and served from Streamlit's cache on every rerun
+@st.cache_data
+def _css() -> str:
+    return """
     <style>
         .main {
             background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
@@ -51,48 +47,24 @@ def set_custom_css():
             text-align: left;
         }
     </style>
-    """, unsafe_allow_html=True)
-
-# Initialize agents
-def initialize_agents():
-    web_agent = Agent(
-        name="Web Agent",
-        role="Search the web for information",
-        model=Groq(id="llama-3.3-70b-versatile", api_key=groq_api_key, temperature=0.2, max_retries=2),
-        tools=[DuckDuckGoTools()],
-        instructions="Use this agent for market trends, news, and competitor analysis",
-        show_tool_calls=True,
-        markdown=True,
-    )
+    """
 
-    finance_agent = Agent(
-        name="Finance Agent",
-        role="Get financial data",
-        model=Groq(id="llama3-70b-8192", api_key=groq_api_key, temperature=0.2, max_retries=2),
-        tools=[YFinanceTools(stock_price=True, analyst_recommendations=True, company_info=True)],
-        instructions="Use this agent for stock prices, analyst ratings, and financial metrics",
-        show_tool_calls=True,
-        markdown=True,
-    )
-
-    return Agent(
-        team=[web_agent, finance_agent],
-        model=Groq(id="llama-3.1-8b-instant", api_key=groq_api_key, temperature=0.2, max_retries=2),
-        instructions=[
-            "Use this routing logic:",
-            "1. For questions containing: stock symbols ($), 'financial', 'invest' -> Use Finance Agent",
-            "2. For questions about news, trends, or general research -> Use Web Agent",
-            "3. For combined queries -> Use both agents sequentially",
-            "4. Always show data sources and use tables for financial data"
-        ],
-        show_tool_calls=True,
-        markdown=True,
-    )
+# Set up custom CSS
+def set_custom_css():
+    st.markdown(_css(), unsafe_allow_html=True)
 
 # Streamlit app
 def main():
     set_custom_css()
+    # The chat id lives in the URL (?chat=...), so a reload picks the archived history back up
+    session_id = st.query_params.get("chat") or uuid4().hex
+    st.query_params["chat"] = session_id
     
+    if st.sidebar.button("🗑️ Clear Chat History"):
+        chat_history.clear(CHAT_APP, session_id)
+        st.session_state.messages = chat_history.load_recent(CHAT_APP, session_id)
+        st.rerun() # Rerun to clear the chat display immediately
+
     st.title("💰 Financial Intelligence Assistant")
     st.markdown("""
     Welcome to your AI-powered financial research assistant! I can:
@@ -101,55 +73,66 @@ def main():
     - 💡 Provide investment recommendations
     """)
     
-    # Initialize chat history
+    # Initialize chat history (a bounded deque of the newest archived messages)
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        st.session_state.messages = chat_history.load_recent(CHAT_APP, session_id)
+    
+    # Older messages stay in the archive and are only rendered on request
+    if st.session_state.messages and chat_history.has_older(CHAT_APP, session_id, st.session_state.messages[0]["id"]):
+        with st.expander("Older messages"):
+            if st.toggle("Load older messages"):
+                for message in chat_history.load_older(CHAT_APP, session_id, st.session_state.messages[0]["id"]):
+                    with st.chat_message(message["role"]):
+                        st.markdown(message["content"], unsafe_allow_html=True)
     
     # Display chat history
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"], unsafe_allow_html=True)
     
+    # Get the agent team (built once per process)
+    agent_team = get_team("groq")
+    
     # Get user input
     if prompt := st.chat_input("Ask your financial question..."):
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        chat_history.append(CHAT_APP, session_id, st.session_state.messages, "user", prompt)
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Initialize agent team
-        agent_team = initialize_agents()
-        
         # Generate response
         with st.chat_message("assistant"):
+            with st.status("Thinking...", expanded=True) as status:
+                # Clear-cut prompts skip the coordinator's routing call: one member answers directly,
+                # or every member named runs at once and the coordinator only combines their findings
+                members = match_members(prompt, "groq")
+                if len(members) == 1:
+                    status.write(f"Routing to {members[0].name}...")
+                elif members:
+                    status.write(f"Asking {' and '.join(member.name for member in members)} in parallel...")
+                else:
+                    status.write("Asking the coordinator to route the question...")
             response_container = st.empty()
             full_response = ""
             
             try:
-                # Get the response from the agent
-                response = agent_team.run(prompt)
-                
-                # Extract the content from the response
-                if hasattr(response, 'content'):
-                    response_content = response.content
-                else:
-                    response_content = str(response)
-                
-                # Simulate streaming effect
-                for i in range(0, len(response_content), 5):
-                    chunk = response_content[:i+5]
-                    response_container.markdown(chunk + "▌", unsafe_allow_html=True)
-                    time.sleep(0.02)  # Adjust speed here
-                
-                # Display final response
-                response_container.markdown(response_content, unsafe_allow_html=True)
-                full_response = response_content
+                agent, run_prompt = (members[0], prompt) if len(members) == 1 else (agent_team, prompt)
+                if len(members) > 1:
+                    run_prompt = synthesis_prompt(prompt, run_members_in_parallel(members, prompt))
+                    status.write("Combining their findings...")
+                # Runs on a worker thread; tool calls are logged in the status box as they start
+                stream = stream_in_background(agent, run_prompt, on_tool_call=lambda call: status.write(f"Calling `{call}`"))
+                full_response = response_container.write_stream(stream)
+                # Re-render the finished answer exactly as the history loop will on later reruns
+                response_container.markdown(full_response, unsafe_allow_html=True)
+                status.update(label="Done", state="complete", expanded=False)
 
             except Exception as e:
+                status.update(label="Error", state="error")
                 full_response = f"⚠️ Error: {str(e)}"
                 response_container.markdown(full_response)
             
-            st.session_state.messages.append({"role": "assistant", "content": full_response})
+            chat_history.append(CHAT_APP, session_id, st.session_state.messages, "assistant", full_response)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,7 +3,6 @@ from agno.agent import Agent
 from agno.models.google import Gemini  # Assuming a Gemini class exists in agno.models
 from agno.tools.yfinance import YFinanceTools
 import os
-import time
 from dotenv import load_dotenv
 import pandas as pd
 import plotly.express as px
@@ -238,15 +237,7 @@ def main():
                 else:
                     full_response_content = str(response)  # Fallback
 
-                # --- Simulate Streaming Output ---
-                display_text = ""
-                for i in range(0, len(full_response_content), 5):  # Process in chunks
-                    chunk = full_response_content[:i + 5]
-                    display_text = chunk
-                    response_container.markdown(display_text + "▌", unsafe_allow_html=True)
-                    time.sleep(0.01)  # Smaller delay for faster perceived streaming
-
-                # Display final response without cursor
+                # Display the finished response in a single render (no simulated typing delay)
                 response_container.markdown(full_response_content, unsafe_allow_html=True)
 
                 # --- Automatic Chart Generation (DISABLED) ---
@@ -1,55 +1,51 @@
-import os
-from agno.agent import Agent
-from agno.models.groq import Groq
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.yfinance import YFinanceTools
-
-from dotenv import load_dotenv
-load_dotenv()
-
-groq_api_key = os.environ['GROQ_API_KEY']
-
-web_agent = Agent(
-    name="Web Agent",
-    role="Search the web for information",
-    model=Groq(id="llama-3.3-70b-versatile", api_key=groq_api_key, temperature=0.2, max_retries=2),
-    tools=[DuckDuckGoTools()],
-    instructions="Use this agent for market trends, news, and competitor analysis",
-    show_tool_calls=True,
-    markdown=True,
-)
-
-finance_agent = Agent(
-    name="Finance Agent",
-    role="Get financial data",
-    model=Groq(id="llama3-70b-8192", api_key=groq_api_key, temperature=0.2, max_retries=2),
-    tools=[YFinanceTools(stock_price=True, analyst_recommendations=True, company_info=True)],
-    instructions="Use this agent for stock prices, analyst ratings, and financial metrics",
-    show_tool_calls=True,
-    markdown=True,
-)
-
-agent_team = Agent(
-    team=[web_agent, finance_agent],
-    model=Groq(id="llama-3.1-8b-instant", api_key=groq_api_key, temperature=0.2, max_retries=2),
-    instructions=[
-        "Use this routing logic:",
-        "1. For questions containing: stock symbols ($), 'financial', 'invest' -> Use Finance Agent",
-        "2. For questions about news, trends, or general research -> Use Web Agent",
-        "3. For combined queries -> Use both agents sequentially",
-        "4. Always show data sources and use tables for financial data"
-    ],
-    show_tool_calls=True,
-    markdown=True,
-)
+import asyncio
+from agents import get_team, get_member, route_query, synthesis_prompt
+
+agent_team = get_team("groq")
+web_agent = get_member("Web Agent")
+finance_agent = get_member("Finance Agent")
+
+
+def split_combined_query(query: str) -> dict:
+    """Splits a 'WEB: / FINANCE: / COMBINE:' style query into its labelled parts."""
+    parts = {}
+    for line in query.splitlines():
+        label, sep, text = line.partition(":")
+        if sep and label.strip().upper() in ("WEB", "FINANCE", "COMBINE"):
+            parts[label.strip().upper()] = text.strip()
+    return parts
+
+
+async def run_query(query: str):
+    parts = split_combined_query(query)
+    if "WEB" not in parts or "FINANCE" not in parts:
+        # Clear-cut queries go straight to one member, skipping the coordinator's routing call
+        await (route_query(query) or agent_team).aprint_response(query, stream=True)
+        return
+
+    # The web and finance lookups don't depend on each other, so run them
+    # concurrently: wall-clock time becomes the slower of the two, not the sum.
+    web_response, finance_response = await asyncio.gather(
+        web_agent.arun(parts["WEB"]),
+        finance_agent.arun(parts["FINANCE"]),
+    )
+
+    # Hand both results back to the coordinator for the final synthesis
+    await agent_team.aprint_response(
+        synthesis_prompt(
+            parts.get('COMBINE', 'Combine the findings below into one answer.'),
+            {web_agent.name: web_response.content, finance_agent.name: finance_response.content},
+        ),
+        stream=True,
+    )
+
 
 try:
     #agent_team.print_response("What is the current stock price of HP? ", stream=True)
-    agent_team.print_response(
+    asyncio.run(run_query(
     "FINANCE: Compare TSLA and AAPL valuations\n"
     "WEB: Find latest EV market trends\n"
-    "COMBINE: Make investment recommendations",
-    stream=True
-)
+    "COMBINE: Make investment recommendations"
+))
 except Exception as e:
     print(f"Error: {e}")
\ No newline at end of file
@@ -0,0 +1,74 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterator, Optional
+from agno.agent import Agent
+from agno.run.response import RunEvent
+
+# Each run gets its own worker thread, so the network wait never blocks
+# Streamlit's script thread and one session's run never stalls another's.
+# (agno runs a coordinator's hand-off to a member as a blocking call even
+# under `arun`, so sessions sharing one event loop would queue behind it.)
+
+_DONE = object() # Sentinel marking the end of a run
+
+class _ToolCall(str):
+    """A tool call the agent started, e.g. "get_current_stock_price(symbol=NVDA)"."""
+
+def stream_in_background(agent: Agent, prompt: str, poll_interval: float = 0.05,
+                         min_render_interval: float = 0.04,
+                         on_tool_call: Optional[Callable[[str], None]] = None) -> Iterator[str]:
+    """Runs `agent.run(prompt, stream=True)` on a worker thread and yields text chunks as they arrive.
+
+    Tokens arriving within `min_render_interval` seconds of the last yield are
+    coalesced into one chunk, so the UI redraws at most ~25 times a second
+    however finely the model streams. If `on_tool_call` is given, it is called
+    in the caller's thread with each tool call as it starts (a coordinator's
+    hand-off to a member shows up as a `transfer_task_to_...` call). Errors
+    raised by the run are re-raised in the caller. Closing the generator
+    (e.g. when Streamlit stops the script) stops the run at its next event.
+    """
+    chunks: queue.Queue = queue.Queue()
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            for event in agent.run(prompt, stream=True, stream_intermediate_steps=on_tool_call is not None):
+                if stopped.is_set():
+                    break
+                if event.event == RunEvent.tool_call_started and event.content:
+                    chunks.put(_ToolCall(event.content))
+                elif event.event == RunEvent.run_response and event.content:
+                    chunks.put(event.content)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_DONE)
+
+    threading.Thread(target=produce, name="agent-run", daemon=True).start()
+    pending = []
+    last_yield = 0.0 # The first token is rendered straight away
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=poll_interval)
+            except queue.Empty:
+                item = None
+            if isinstance(item, Exception):
+                raise item
+            if isinstance(item, _ToolCall):
+                if on_tool_call is not None:
+                    on_tool_call(item)
+                item = None
+            if item is not None and item is not _DONE:
+                pending.append(item)
+
+            now = time.monotonic()
+            if pending and (item is _DONE or now - last_yield >= min_render_interval):
+                yield "".join(pending)
+                pending.clear()
+                last_yield = now
+            if item is _DONE:
+                return
+    finally:
+        stopped.set()
@@ -16,7 +16,7 @@ class StockAnalysis(BaseModel):
 stock_searcher = Agent(
     name="Stock Searcher",
     model=OpenAIChat("gpt-4o"),
-    #response_model=StockAnalysis,
+    response_model=StockAnalysis,
     role="Searches the web for information on a stock.",
     tools=[
         YFinanceTools(
@@ -1,107 +1,34 @@
 import streamlit as st
-from agno.agent import Agent
-from agno.models.google import Gemini  # Assuming a Gemini class exists in agno.models
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.yfinance import YFinanceTools
-import os
-import time
-from dotenv import load_dotenv
-import pandas as pd
-import plotly.express as px
+import chat_history
+from uuid import uuid4
+import json
 import re
 from typing import List, Dict, Any # For type hinting
+from config import require_api_key
+from agents import YF_CACHE_TTL, FinanceResponse, get_prices, get_team, match_members, run_members_in_parallel, synthesis_prompt
+from streaming import stream_in_background
 
-# --- Configuration & Initialization ---
+CHAT_APP = "gemini" # Scopes this app's archived chats apart from the other app's
 
-# Load environment variables from a .env file
-load_dotenv()
+# --- Configuration & Initialization ---
 
 # --- Robust API Key Check ---
-gemini_api_key = os.getenv('GEMINI_API_KEY')
-if not gemini_api_key:
+try:
+    require_api_key('GEMINI_API_KEY')
+except KeyError:
     st.error("🔴 GEMINI_API_KEY not found!")
     st.error("Please ensure you have a .env file in the same directory with GEMINI_API_KEY='your_key'.")
     st.stop() # Stop the application if the key is missing
 
 # --- Cached Resource Initialization ---
-
-@st.cache_resource # Cache the agent team for the session
-def initialize_agents() -> Agent:
-    """Initializes the multi-agent team."""
-    print("--- Initializing Agents (should happen once per session) ---") # For debugging
-    web_agent = Agent(
-        name="Web Agent",
-        role="Search the web for current information, news, and market trends",
-        model=Gemini(id="gemini-2.0-flash", api_key=gemini_api_key, temperature=0.2, grounding=True, search=True), # Faster model for web search summaries
-        tools=[DuckDuckGoTools()],
-        instructions="Focus on retrieving recent and relevant information. Summarize findings concisely in plain text. If you must emphasize, use bold text (`**text**`). Provide source URLs at the end of each summarized point in plain text within parentheses.",
-        show_tool_calls=True,
-        markdown=True,
-    )
-
-    finance_agent = Agent(
-        name="Finance Agent",
-        role="Retrieve and analyze stock data, financial statements, and key metrics",
-        model=Gemini(id="gemini-2.0-flash", api_key=gemini_api_key, temperature=0.1), # Powerful model for financial analysis, low temp
-        tools=[YFinanceTools(
-            stock_price=True,
-            analyst_recommendations=True,
-            company_info=True,
-            stock_fundamentals=True,
-            income_statements=True,
-            key_financial_ratios=True
-        )],
-        # *** INSTRUCTION MODIFIED ***
-        instructions=[
-            "Provide detailed financial information using the available tools.",
-            "Present financial data (fundamentals, ratios, income statements) in well-formatted Markdown tables.",
-            "Offer brief interpretations or summaries of the data.",
-            "IMPORTANT: Clearly state the primary stock ticker symbol (e.g., MSFT, GOOGL) for which you are providing data, usually near the beginning of your response or table.",
-            "If multiple tickers are relevant, focus on the main one queried.",
-        ],
-        show_tool_calls=True,
-        markdown=True,
-    )
-
-    sentiment_agent = Agent(
-        name="Sentiment Analyzer",
-        role="Analyze the sentiment of provided text (e.g., news snippets)",
-        model=Gemini(id="gemini-2.0-flash", api_key=gemini_api_key, temperature=0.3), # Fast model for sentiment
-        instructions="Analyze the sentiment (positive, negative, neutral) of the input text and provide a brief justification.",
-        show_tool_calls=False,
-        markdown=True,
-    )
-
-    # Coordinator Agent
-    agent_team = Agent(
-        team=[web_agent, finance_agent, sentiment_agent],
-        model=Gemini(id="gemini-2.0-flash", api_key=gemini_api_key, temperature=0.2), # Fast model for routing
-        instructions=[
-            "Carefully analyze the user's query and route it to the most appropriate agent or sequence of agents based on keywords.",
-            "Routing Logic:",
-            "1. Stock symbols ($, or common patterns like AAPL, MSFT), 'stock', 'financial', 'invest', 'price', 'recommendation', 'earnings', 'fundamentals', 'income statement', 'financial ratios' -> **Finance Agent** is primary. If news is also asked for, use Web Agent first, then Finance Agent.",
-            "2. General news, market trends, competitor research -> **Web Agent**.",
-            "3. Explicit request to 'analyze sentiment' -> **Sentiment Analyzer** (requires text input, potentially from Web Agent first).",
-            "4. Combine results logically if multiple agents are used.",
-            "5. Ensure the final response is comprehensive and directly answers the user's query.",
-            "6. Prefer Markdown tables for structured financial data presentation (Finance Agent should handle this)."
-        ],
-        show_tool_calls=True,
-        markdown=True,
-    )
-    return agent_team
-
-@st.cache_resource # Cache the YFinanceTools instance
-def get_yfinance_tool() -> YFinanceTools:
-    """Creates and caches a YFinanceTools instance."""
-    print("--- Initializing YFinance Tool (should happen once per session) ---") # For debugging
-    return YFinanceTools(stock_price=True) # Only need stock price capability here
+# The agent team and YFinance tools are built and cached once per process in agents.py
 
 # --- UI and Helper Functions ---
 
-def set_custom_css():
-    """Applies custom CSS styles to the Streamlit app."""
-    st.markdown("""
+@st.cache_data # Build the CSS blob once instead of on every rerun
+def _css() -> str:
+    """Returns the custom CSS styles as a <style> block."""
+    return """
     <style>
         /* [Keep the same CSS as before] */
         .main { background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%); }
@@ -114,64 +41,80 @@ def set_custom_css():
         .stMarkdown td { padding: 12px; border: 1px solid #ddd; text-align: left; }
         .sidebar .stButton button { width: 100%; margin-bottom: 0.5rem; }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def set_custom_css():
+    """Applies custom CSS styles to the Streamlit app."""
+    st.markdown(_css(), unsafe_allow_html=True)
+
+@st.cache_data(ttl=YF_CACHE_TTL) # Repeat charts for a ticker within the TTL skip Yahoo
+def fetch_stock_prices(ticker: str) -> Dict[str, float]:
+    """Fetches recent daily closing prices for charting, as {date: close}; empty if Yahoo has none."""
+    result = get_prices([ticker])
+    if not result.startswith("{"): # get_prices reports failures as plain text
+        raise RuntimeError(result)
+    return json.loads(result)["prices"].get(ticker.upper(), {})
 
-def display_stock_chart(ticker: str, yf_tools: YFinanceTools):
+def display_stock_chart(ticker: str):
     """Fetches and displays a stock price chart."""
+    # Imported here rather than at module top: most reruns never draw a chart
+    import numpy as np
+    import plotly.graph_objects as go
+
     st.write(f"--- Generating Chart for {ticker} ---") # Info message
     try:
-        # Use the cached yfinance tool instance passed as an argument
-        stock_data = yf_tools.get_stock_price(tickers=[ticker])
-
-        if stock_data and ticker in stock_data and stock_data[ticker].get('prices'):
-            df = pd.DataFrame(stock_data[ticker]['prices'])
-            if 'timestamp' not in df.columns or 'close' not in df.columns:
-                st.warning(f"Price data for {ticker} is missing expected columns.")
-                return
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-            df = df.dropna(subset=['timestamp', 'close']) # Ensure no NaNs in critical columns
-            if not df.empty:
-                fig = px.line(df, x='timestamp', y='close',
-                             title=f'Recent Stock Price Trend for {ticker}',
-                             labels={'timestamp': 'Date', 'close': 'Closing Price'})
-                st.plotly_chart(fig, use_container_width=True) # Use container width for responsiveness
-            else:
-                st.warning(f"No valid price data points found for {ticker} to plot.")
+        closes_by_date = fetch_stock_prices(ticker)
+
+        if closes_by_date:
+            # Feed arrays straight to Plotly instead of building a DataFrame first
+            dates = np.array(list(closes_by_date), dtype='datetime64[D]')
+            closes = np.fromiter(closes_by_date.values(), dtype='float64', count=len(closes_by_date))
+            fig = go.Figure(go.Scattergl(x=dates, y=closes, mode='lines')) # WebGL trace renders large series cheaply
+            fig.update_layout(title=f'Recent Stock Price Trend for {ticker}',
+                              xaxis_title='Date', yaxis_title='Closing Price')
+            st.plotly_chart(fig, use_container_width=True) # Use container width for responsiveness
         else:
             st.warning(f"Could not retrieve sufficient stock price data for {ticker} to plot a chart.")
     except Exception as e:
         st.error(f"⚠️ Error displaying stock chart for {ticker}: {e}")
 
+# Common non-tickers that the ticker pattern would pick up (e.g., 'CEO', 'USA', 'ETF'). Very basic filtering.
+_NON_TICKERS = frozenset({'CEO', 'CFO', 'COO', 'USA', 'ETF', 'LLC', 'INC', 'API', 'NEWS'})
+# Markers of financial data (like a table) in the response
+_TABLE_MARKERS = ('---|---|', 'Recommendation Trend', 'Financial Data')
+# One compiled pattern covering the markers, the blacklist (as a negative
+# lookahead) and 1-5 uppercase letters as whole words (common ticker format),
+# so the response is read in a single left-to-right pass.
+_TICKER_SCAN_RE = re.compile(
+    '(?P<marker>' + '|'.join(re.escape(marker) for marker in _TABLE_MARKERS) + ')'
+    r'|\b(?!(?:' + '|'.join(sorted(_NON_TICKERS)) + r')\b)(?P<ticker>[A-Z]{1,5})\b'
+)
+
 def find_ticker_in_response(text: str) -> str | None:
     """Attempts to find a likely stock ticker symbol in the response text."""
-    # Regex to find 1-5 uppercase letters as whole words (common ticker format)
-    # Prioritize matches near the start or near markdown tables.
+    # Simple heuristic: the first plausible ticker mentioned is usually the primary one,
+    # but only trust it when the text also contains financial data.
     # This is a heuristic and might need refinement.
-    potential_tickers = re.findall(r'\b([A-Z]{1,5})\b', text)
-
-    if not potential_tickers:
-        return None
-
-    # Simple heuristic: Often the first ticker mentioned or one near a table is the primary one.
-    # Check if common non-tickers were accidentally matched (e.g., 'CEO', 'USA', 'ETF'). Very basic filtering.
-    common_non_tickers = {'CEO', 'CFO', 'COO', 'USA', 'ETF', 'LLC', 'INC', 'API', 'NEWS'}
-    for ticker in potential_tickers:
-        if ticker not in common_non_tickers:
-            # Check if the text contains markers of financial data (like a table)
-            if '---|---|' in text or 'Recommendation Trend' in text or 'Financial Data' in text:
-                print(f"--- Ticker Found in Financial Context: {ticker} ---") # Debugging
-                return ticker
-            # Fallback: Return first plausible ticker even without table context, might be less reliable
-            # print(f"--- Plausible Ticker Found (No Table Context): {ticker} ---") # Debugging
-            # return ticker # Optionally enable this less strict fallback
+    ticker = None
+    has_financial_context = False
+    for match in _TICKER_SCAN_RE.finditer(text):
+        if match.lastgroup == 'marker':
+            has_financial_context = True
+        elif ticker is None:
+            ticker = match.group('ticker')
+        if ticker and has_financial_context:
+            print(f"--- Ticker Found in Financial Context: {ticker} ---") # Debugging
+            return ticker
 
     return None # Return None if no suitable ticker is identified
 
-
 # --- Main Application Logic ---
 
 def main():
     set_custom_css()
+    # The chat id lives in the URL (?chat=...), so a reload picks the archived history back up
+    session_id = st.query_params.get("chat") or uuid4().hex
+    st.query_params["chat"] = session_id
 
     st.sidebar.title("Financial Intelligence Options")
     if st.sidebar.button("ℹ️ About"):
@@ -182,15 +125,24 @@ def main():
         - **Sentiment Agent:** Analyzes text sentiment.
         """)
     if st.sidebar.button("🗑️ Clear Chat History"):
-        st.session_state.messages = []
+        chat_history.clear(CHAT_APP, session_id)
+        st.session_state.messages = chat_history.load_recent(CHAT_APP, session_id)
         st.rerun() # Rerun to clear the chat display immediately
 
     st.title("💰 Financial Intelligence Assistant")
     st.markdown("Ask about stocks (e.g., '$AAPL financials', 'MSFT news and price'), market trends, or sentiment.")
 
-    # Initialize or retrieve chat history from session state
+    # Initialize or retrieve chat history from session state (a bounded deque of the newest archived messages)
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        st.session_state.messages = chat_history.load_recent(CHAT_APP, session_id)
+
+    # Older messages stay in the SQLite archive and are only rendered on request
+    if st.session_state.messages and chat_history.has_older(CHAT_APP, session_id, st.session_state.messages[0]["id"]):
+        with st.expander("Older messages"):
+            if st.toggle("Load older messages"):
+                for message in chat_history.load_older(CHAT_APP, session_id, st.session_state.messages[0]["id"]):
+                    with st.chat_message(message["role"]):
+                        st.markdown(message["content"], unsafe_allow_html=True)
 
     # Display chat history
     for message in st.session_state.messages:
@@ -200,8 +152,7 @@ def main():
 
     # --- Get Cached Resources ---
     try:
-        agent_team = initialize_agents()
-        yf_tool_for_charting = get_yfinance_tool()
+        agent_team = get_team("gemini")
     except Exception as e:
         st.error(f"🔴 Critical Error during initialization: {e}")
         st.error("Please check API keys and tool configurations.")
@@ -210,55 +161,64 @@ def main():
     # Get user input
     if prompt := st.chat_input("Ask your financial question..."):
         # Add user message to history and display it
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        chat_history.append(CHAT_APP, session_id, st.session_state.messages, "user", prompt)
         with st.chat_message("user"):
             st.markdown(prompt)
 
         # Generate and display assistant response
         with st.chat_message("assistant"):
-            response_container = st.empty() # Placeholder for streaming effect
+            with st.status("Thinking...", expanded=True) as status: # Live progress while the agents work
+                # Clear-cut prompts skip the coordinator's routing call: one member answers directly,
+                # or every member named runs at once and the coordinator only combines their findings
+                members = match_members(prompt, "gemini")
+                if len(members) == 1:
+                    status.write(f"Routing to {members[0].name}...")
+                elif members:
+                    status.write(f"Asking {' and '.join(member.name for member in members)} in parallel...")
+                else:
+                    status.write("Asking the coordinator to route the question...")
+            response_container = st.empty() # Placeholder for the streamed response
             full_response_content = ""
             potential_ticker_for_chart = None
 
             try:
-                # --- Agent Execution ---
-                response = agent_team.run(prompt)
-
-                # Extract content (handle potential variations in response object)
-                if hasattr(response, 'content'):
-                    full_response_content = response.content
-                elif isinstance(response, str):
-                    full_response_content = response
+                # --- Agent Execution (streamed runs happen on a worker thread) ---
+                agent, run_prompt = (members[0], prompt) if len(members) == 1 else (agent_team, prompt)
+                if len(members) > 1:
+                    run_prompt = synthesis_prompt(prompt, run_members_in_parallel(members, prompt))
+                    status.write("Combining their findings...")
+                if agent.response_model is FinanceResponse:
+                    # The Finance Agent answers with a typed object (not streamable) that names the ticker to chart
+                    response = agent.run(run_prompt).content
+                    if isinstance(response, FinanceResponse):
+                        full_response_content = response.markdown_body
+                        potential_ticker_for_chart = response.primary_ticker
+                    else: # JSON parsing failed; agno hands back the raw text
+                        full_response_content = str(response)
+                        potential_ticker_for_chart = find_ticker_in_response(full_response_content)
+                    response_container.markdown(full_response_content, unsafe_allow_html=True)
                 else:
-                    full_response_content = str(response) # Fallback
-
-                # --- Simulate Streaming Output ---
-                display_text = ""
-                for i in range(0, len(full_response_content), 5): # Process in chunks
-                    chunk = full_response_content[:i+5]
-                    display_text = chunk
-                    response_container.markdown(display_text + "▌", unsafe_allow_html=True)
-                    time.sleep(0.01) # Smaller delay for faster perceived streaming
-
-                # Display final response without cursor
-                response_container.markdown(full_response_content, unsafe_allow_html=True)
-
-                # --- Automatic Chart Generation ---
-                # Try to find a ticker in the *assistant's* response
-                potential_ticker_for_chart = find_ticker_in_response(full_response_content)
+                    # Streamlit's native streaming appends chunks (and draws the cursor) instead of re-rendering the whole text
+                    stream = stream_in_background(agent, run_prompt, on_tool_call=lambda call: status.write(f"Calling `{call}`"))
+                    full_response_content = response_container.write_stream(stream)
+                    # Re-render the finished answer exactly as the history loop will on later reruns
+                    response_container.markdown(full_response_content, unsafe_allow_html=True)
+                    # Free-text answer: try to find a ticker in the *assistant's* response
+                    potential_ticker_for_chart = find_ticker_in_response(full_response_content)
+                status.update(label="Done", state="complete", expanded=False)
 
             except Exception as e:
+                status.update(label="Error", state="error")
                 st.error(f"⚠️ An error occurred: {e}")
                 full_response_content = f"Sorry, I encountered an error processing your request: {e}"
                 response_container.markdown(full_response_content)
 
             # Add assistant's response to history
-            st.session_state.messages.append({"role": "assistant", "content": full_response_content})
+            chat_history.append(CHAT_APP, session_id, st.session_state.messages, "assistant", full_response_content)
 
             # Display chart if a ticker was identified in a relevant response
             if potential_ticker_for_chart:
-                # Pass the cached yfinance tool instance
-                display_stock_chart(potential_ticker_for_chart, yf_tool_for_charting)
+                display_stock_chart(potential_ticker_for_chart)
 
 
 if __name__ == "__main__":